@@ -84,6 +84,20 @@ class ScoredQuerySampler(BaseQuerySampler):
         """
         pass
 
+    def _top_k_indices(self, sample_scores: np.array, k: int) -> np.array:
+        """Returns the indices of the k highest scores.
+
+        Args:
+            sample_scores: Scores of the samples.
+            k: Number of indices to return.
+
+        Returns:
+            Indices of the k highest scores, sorted by increasing score.
+        """
+        # Partial sort of the top scores, then order them increasingly
+        index = np.argpartition(sample_scores, -k)[-k:]
+        return index[np.argsort(sample_scores[index])]
+
     def select_samples(self, X: np.array) -> np.array:
         """Selects the samples from unlabeled data using the internal scoring.
 
@@ -101,7 +115,7 @@ class ScoredQuerySampler(BaseQuerySampler):
         sample_scores = self.score_samples(X)
         self.sample_scores_ = sample_scores
         if self.strategy == 'top':
-            index = np.argsort(sample_scores)[-self.batch_size:]
+            index = self._top_k_indices(sample_scores, self.batch_size)
         elif self.strategy == 'weighted':
             index = self.random_state.choice(
                 np.arange(X.shape[0]), size=self.batch_size,
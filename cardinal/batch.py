@@ -6,11 +6,40 @@ import numpy as np
 from .version import check_modules
 check_modules('sklearn', 'batch')  # noqa
 
-from sklearn.metrics import pairwise_distances, pairwise_distances_argmin_min
+from sklearn.metrics import (pairwise_distances, pairwise_distances_argmin_min,
+                             pairwise_distances_chunked)
+from sklearn.neighbors import KDTree
+from sklearn.utils.extmath import row_norms
 
 from .base import BaseQuerySampler
 
 
+# Above this number of features, trees stop outperforming brute force for
+# nearest neighbors queries. This is the threshold used by scikit-learn.
+_MAX_TREE_FEATURES = 15
+
+
+def _euclidean_distances_to_sample(X, sq_norms, index, out):
+    """Computes in place the euclidean distances of samples to one of them.
+
+    Args:
+        X: Samples of shape (n_samples, n_features), in float64.
+        sq_norms: Squared norms of the samples of shape (n_samples).
+        index: Index of the reference sample in X.
+        out: Array of shape (n_samples) in float64 where distances are
+            stored.
+
+    Returns:
+        The out array.
+    """
+    np.dot(X, X[index], out=out)
+    out *= -2.
+    out += sq_norms
+    out += sq_norms[index]
+    np.maximum(out, 0., out=out)
+    return np.sqrt(out, out=out)
+
+
 class RankedBatchSampler(BaseQuerySampler):
     """Selects samples to label by maximizing the distance between them.
 
@@ -50,37 +79,89 @@ class RankedBatchSampler(BaseQuerySampler):
             return np.arange(X.shape[0])
 
         n_samples = X.shape[0]
-        index = np.arange(n_samples)
         unlabeled_mask = (samples_weights > -.5)
+        unlabeled_index = np.flatnonzero(unlabeled_mask)
         n_unlabeled = unlabeled_mask.sum()
 
-        # We are going to modify this array so we copy it
-        samples_weights = samples_weights.copy()
-
-        # We compute the distances for labeled data in 2 steps
-        _, similarity_scores = pairwise_distances_argmin_min(
-            X[unlabeled_mask], X[np.logical_not(unlabeled_mask)],
-            metric=self.metric)
-        similarity_scores = 1 / (1 + similarity_scores)
+        # Weights of unlabeled samples, set to 0 once they are selected
+        samples_weights_unlabeled = samples_weights[unlabeled_mask]
+
+        # Unlabeled samples are extracted once and for all
+        X_unlabeled = np.ascontiguousarray(X[unlabeled_mask])
+
+        labeled_mask = np.logical_not(unlabeled_mask)
+
+        # For euclidean distance, squared norms are computed once and reused
+        # at each iteration. Distances to a single sample then boil down to a
+        # dot product handled by BLAS, computed in a preallocated buffer.
+        use_dot = (self.metric == 'euclidean')
+
+        # We track the distance of each unlabeled sample to its closest
+        # labeled sample. The similarity 1 / (1 + d) is only derived at
+        # scoring time.
+        if use_dot:
+            # The expansion ||a||^2 - 2 a.b + ||b||^2 suffers from
+            # cancellation, so like scikit-learn we compute it in float64
+            X_unlabeled = X_unlabeled.astype(np.float64, copy=False)
+            sq_norms_unlabeled = row_norms(X_unlabeled, squared=True)
+            new_distances = np.empty(n_unlabeled, dtype=np.float64)
+            X_labeled = X[labeled_mask].astype(np.float64, copy=False)
+            if X.shape[1] <= _MAX_TREE_FEATURES:
+                # In low dimension, a KD-tree answers nearest labeled
+                # sample queries faster than brute force
+                tree = KDTree(X_labeled)
+                min_distances = tree.query(X_unlabeled, k=1)[0][:, 0]
+            else:
+                # Otherwise we use brute force, reusing the squared norms of
+                # labeled samples in each chunk
+                min_distances = np.concatenate(list(
+                    pairwise_distances_chunked(
+                        X_unlabeled, X_labeled,
+                        reduce_func=lambda chunk, start: chunk.min(axis=1),
+                        Y_norm_squared=row_norms(X_labeled, squared=True),
+                        squared=True)))
+                np.sqrt(min_distances, out=min_distances)
+        else:
+            _, min_distances = pairwise_distances_argmin_min(
+                X_unlabeled, X[labeled_mask], metric=self.metric)
 
         selected_samples = []
 
+        # Scores are computed in preallocated buffers
+        scores = np.empty(n_unlabeled)
+        weighted_term = np.empty(n_unlabeled)
+
         for _ in range(self.batch_size):
 
             alpha = n_unlabeled / n_samples
-            scores = (alpha * (1 - similarity_scores)
-                      + (1 - alpha) * samples_weights[unlabeled_mask])
-
-            idx_furthest = index[unlabeled_mask][np.argmax(scores)]
+            # alpha * (1 - 1 / (1 + d)) + (1 - alpha) * w
+            # = alpha * d / (1 + d) + (1 - alpha) * w
+            np.add(min_distances, 1., out=scores)
+            np.divide(min_distances, scores, out=scores)
+            scores *= alpha
+            np.multiply(samples_weights_unlabeled, 1 - alpha,
+                        out=weighted_term)
+            scores += weighted_term
+
+            local_furthest = np.argmax(scores)
+            idx_furthest = unlabeled_index[local_furthest]
             selected_samples.append(idx_furthest)
 
-            # Update similarities considering the selected sample as labeled
+            # Update distances considering the selected sample as labeled
             # We could remove its value from the array but we avoid realloc
-            sim = 1 / (1 + pairwise_distances(
-                X[unlabeled_mask], X[idx_furthest, None],
-                metric=self.metric)[:, 0])
-            similarity_scores = np.max([similarity_scores, sim], axis=0)
-            samples_weights[idx_furthest] = 0.
+            if use_dot:
+                _euclidean_distances_to_sample(
+                    X_unlabeled, sq_norms_unlabeled, local_furthest,
+                    out=new_distances)
+            else:
+                new_distances = pairwise_distances(
+                    X_unlabeled, X_unlabeled[local_furthest, None],
+                    metric=self.metric)[:, 0]
+            np.minimum(min_distances, new_distances, out=min_distances)
+            # Rounding errors can leave a non-zero distance of the selected
+            # sample to itself, we make sure it is never selected again
+            min_distances[local_furthest] = 0.
+            samples_weights_unlabeled[local_furthest] = 0.
             n_unlabeled -= 1
 
         return np.asarray(selected_samples)
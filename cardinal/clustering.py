@@ -66,8 +66,10 @@ class KMeansSampler(KCentroidSampler):
 
     Args:
         batch_size: Number of samples to draw when predicting.
+        warm_start: If True, the clustering is initialized with the
+            centroids found at the previous call of select_samples.
     """
-    def __init__(self, batch_size, **kmeans_args):
+    def __init__(self, batch_size, warm_start=False, **kmeans_args):
         check_modules('sklearn', 'clustering.KmeansSampler')
         from sklearn.cluster import KMeans
 
@@ -78,6 +80,24 @@ class KMeansSampler(KCentroidSampler):
                 'batch_size.'.format(kmeans_args['n_clusters']))
         kmeans_args['n_clusters'] = batch_size
         super().__init__(KMeans(**kmeans_args), batch_size)
+        self.warm_start = warm_start
+
+    def select_samples(self, X: np.array,
+                       sample_weight: np.array = None) -> np.array:
+        """Clusters the samples and select the ones closest to centroids.
+
+        Args:
+            X: Pool of unlabeled samples of shape (n_samples, n_features).
+            sample_weight: Weight of the samples of shape (n_samples),
+                optional.
+
+        Returns:
+            Indices of the selected samples of shape (batch_size).
+        """
+        if self.warm_start and hasattr(self.clustering_, 'cluster_centers_'):
+            self.clustering_.set_params(
+                init=self.clustering_.cluster_centers_, n_init=1)
+        return super().select_samples(X, sample_weight=sample_weight)
 
 
 class MiniBatchKMeansSampler(KCentroidSampler):
@@ -285,7 +305,7 @@ class KCenterGreedy(BaseQuerySampler):
 
             # Consider this point added to label by updating distances
             distances_to_new = pairwise_distances(X, X[selected[-1], None], metric=self.metric)[:, 0]
-            distances = np.min([distances, distances_to_new], axis=0)
+            np.minimum(distances, distances_to_new, out=distances)
             
             if np.allclose(distances, 0.):
                 # Distances have collapsed, we select randomly the rest of the samples
@@ -67,8 +67,9 @@ class ContradictionMonitor(BaseMonitor):
     """
     def accumulate(self, n_samples: int, probas_test: np.array):
         if self.last_probas_test is not None:
-            self.values.append(
-                np.abs(probas_test - self.last_probas_test).sum())
+            # The absolute value is taken in place to avoid a temporary
+            difference = probas_test - self.last_probas_test
+            self.values.append(np.abs(difference, out=difference).sum())
             self._append_n_samples(n_samples)
         self.last_probas_test = probas_test
 
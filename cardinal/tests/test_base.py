@@ -0,0 +1,14 @@
+import numpy as np
+
+from cardinal.random import RandomSampler
+
+
+def test_top_k_indices():
+
+    rng = np.random.RandomState(0)
+    scores = rng.permutation(100).astype(float)
+    sampler = RandomSampler(10)
+
+    for k in [1, 10, 100]:
+        indices = sampler._top_k_indices(scores, k)
+        np.testing.assert_array_equal(indices, np.argsort(scores)[-k:])
@@ -0,0 +1,90 @@
+import numpy as np
+from sklearn.metrics import pairwise_distances, pairwise_distances_argmin_min
+
+from cardinal.batch import RankedBatchSampler
+
+
+###################################################################################
+# THIS IS THE REFERENCE IMPLEMENTATION OF RANKED BATCH
+# Our implementation tracks raw distances in place but must have the exact same
+# outcome. I put it here for testing purposes.
+
+def ranked_batch_reference(X, samples_weights, batch_size, metric='euclidean'):
+    n_samples = X.shape[0]
+    index = np.arange(n_samples)
+    unlabeled_mask = (samples_weights > -.5)
+    n_unlabeled = unlabeled_mask.sum()
+    samples_weights = samples_weights.copy()
+
+    _, similarity_scores = pairwise_distances_argmin_min(
+        X[unlabeled_mask], X[np.logical_not(unlabeled_mask)], metric=metric)
+    similarity_scores = 1 / (1 + similarity_scores)
+
+    selected_samples = []
+    for _ in range(batch_size):
+        alpha = n_unlabeled / n_samples
+        scores = (alpha * (1 - similarity_scores)
+                  + (1 - alpha) * samples_weights[unlabeled_mask])
+        idx_furthest = index[unlabeled_mask][np.argmax(scores)]
+        selected_samples.append(idx_furthest)
+        sim = 1 / (1 + pairwise_distances(
+            X[unlabeled_mask], X[idx_furthest, None], metric=metric)[:, 0])
+        similarity_scores = np.max([similarity_scores, sim], axis=0)
+        samples_weights[idx_furthest] = 0.
+        n_unlabeled -= 1
+
+    return np.asarray(selected_samples)
+
+
+def test_ranked_batch_against_ref():
+
+    rng = np.random.RandomState(0)
+    X = rng.rand(200, 8)
+    samples_weights = rng.rand(200)
+    samples_weights[rng.choice(200, 20, replace=False)] = -1
+
+    # Offset float32 data is prone to cancellation in distance computations
+    X_offset = (X + 1000).astype(np.float32)
+    zero_weights = np.zeros(200)
+    zero_weights[samples_weights < 0] = -1
+
+    for X_, weights in [(X, samples_weights), (X_offset, zero_weights)]:
+        for metric in ['euclidean', 'manhattan']:
+            sampler = RankedBatchSampler(10, metric=metric)
+            sampler.fit(X_)
+            selected = sampler.select_samples(X_, weights)
+            ref = ranked_batch_reference(X_, weights, 10, metric=metric)
+            np.testing.assert_array_equal(selected, ref)
+
+
+def test_ranked_batch_no_duplicates():
+
+    for seed in range(5):
+        rng = np.random.RandomState(seed)
+        X = (rng.rand(500, 16) + 1000).astype(np.float32)
+        samples_weights = np.zeros(500)
+        samples_weights[:10] = -1
+
+        selected = RankedBatchSampler(50).select_samples(X, samples_weights)
+        assert(np.unique(selected).shape[0] == 50)
+
+
+def test_ranked_batch_not_enough_samples():
+
+    X = np.random.rand(5, 2)
+    sampler = RankedBatchSampler(10)
+    selected = sampler.select_samples(X, np.zeros(5))
+    np.testing.assert_array_equal(selected, np.arange(5))
+
+
+def test_ranked_batch_high_dimension_against_ref():
+
+    # Brute force is used for the initial pass above 15 features
+    rng = np.random.RandomState(0)
+    X = rng.rand(200, 32)
+    samples_weights = rng.rand(200)
+    samples_weights[rng.choice(200, 20, replace=False)] = -1
+
+    selected = RankedBatchSampler(10).select_samples(X, samples_weights)
+    ref = ranked_batch_reference(X, samples_weights, 10)
+    np.testing.assert_array_equal(selected, ref)
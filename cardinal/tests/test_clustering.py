@@ -1,6 +1,6 @@
 import numpy as np
 
-from cardinal.clustering import KCenterGreedy
+from cardinal.clustering import KCenterGreedy, KMeansSampler
 from sklearn.metrics import pairwise_distances
 from scipy.spatial import distance
 import abc
@@ -163,4 +163,31 @@ def test_k_center_greedy_against_ref():
     sampler.fit(X[np.arange(10)])
     our_selection = sampler.select_samples(X[10:]) + 10
 
-    assert((ref_selection == our_selection).all())
\ No newline at end of file
+    assert((ref_selection == our_selection).all())
+
+
+def test_kmeans_sampler_warm_start():
+
+    from sklearn.cluster import KMeans
+    from scipy.optimize import linear_sum_assignment
+
+    rng = np.random.RandomState(0)
+    X = rng.rand(100, 2)
+
+    sampler = KMeansSampler(5, warm_start=True, random_state=0)
+    sampler.fit(X[:20])
+    sampler.select_samples(X[20:])
+    centers = sampler.clustering_.cluster_centers_.copy()
+
+    # The second clustering is seeded with the previous centroids
+    indices = sampler.select_samples(X[40:])
+    assert(indices.shape[0] == 5)
+    assert(sampler.clustering_.n_init == 1)
+    np.testing.assert_array_equal(sampler.clustering_.init, centers)
+
+    # It must match a cold KMeans explicitly initialized with them
+    kmeans = KMeans(5, init=centers, n_init=1, random_state=0).fit(X[40:])
+    np.testing.assert_allclose(sampler.clustering_.cluster_centers_,
+                               kmeans.cluster_centers_)
+    ref_indices = linear_sum_assignment(kmeans.transform(X[40:]))[0]
+    np.testing.assert_array_equal(indices, ref_indices)
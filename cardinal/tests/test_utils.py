@@ -1,5 +1,5 @@
 import numpy as np
-from cardinal.utils import ActiveLearningSplitter
+from cardinal.utils import ActiveLearningSplitter, pad_with_random
 from pytest import raises
 
 
@@ -61,4 +61,16 @@ def test_active_learning_splitter_random_init():
         splitter = ActiveLearningSplitter(n_samples, test_index=test_indices)
         classes = np.random.choice(n_classes, replace=True, size=n_samples)
         splitter.initialize_with_random(n_classes, classes[splitter.train])
-        assert(np.unique(classes[splitter.selected]).shape[0] == n_classes)
\ No newline at end of file
+        assert(np.unique(classes[splitter.selected]).shape[0] == n_classes)
+
+
+def test_pad_with_random():
+
+    selected = np.array([2, 5, 7])
+    padded = pad_with_random(selected, 10, 0, 12, random_state=0)
+    assert(padded.shape[0] == 10)
+    assert(np.unique(padded).shape[0] == 10)
+    assert((padded[:3] == selected).all())
+
+    # Nothing to pad
+    assert(pad_with_random(selected, 2, 0, 12) is selected)
@@ -17,7 +17,7 @@ def pad_with_random(array, size, min, max, random_state=None):
     mask = np.ones(max - min, dtype=bool)
     mask[array - min] = False
     choices = choices[mask]
-    padding = random_state.choice(choices, n_missing)
+    padding = random_state.choice(choices, n_missing, replace=False)
     return np.concatenate([array, padding])
 
 
@@ -15,6 +15,8 @@ first select samples using uncertainty and then performs a KMeans.
 ##############################################################################
 # Those are the necessary imports and initializations
 
+from copy import deepcopy
+
 from matplotlib import pyplot as plt
 import numpy as np
 from time import time
@@ -22,7 +24,7 @@ from time import time
 from sklearn.datasets import load_digits
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
-from sklearn.cluster import KMeans
+from sklearn.cluster import MiniBatchKMeans
 
 from cardinal.uncertainty import MarginSampler
 from cardinal.clustering import KMeansSampler
@@ -41,15 +43,18 @@ np.random.seed(7)
 #   the training set at each iteration,
 # * ``n_iter`` is the number of iterations in the simulation.
 #
-# We use the digits dataset and a RandomForestClassifier.
+# We use the digits dataset and a RandomForestClassifier whose trees are
+# fitted in parallel.
 
 batch_size = 45
 n_iter = 10
 
 X, y = load_digits(return_X_y=True)
 X /= 255.
+X = X.astype(np.float32)
+n_classes = 10
 
-model = RandomForestClassifier()
+model = RandomForestClassifier(n_jobs=-1)
 
 ##############################################################################
 # A new Custom Sampler
@@ -62,12 +67,16 @@ model = RandomForestClassifier()
 #
 # We hypothetize that inversing these steps can also be an interesting
 # approach. For that, we first perform a KMeans clustering, and then select
-# within each cluster the most uncertain samples.
+# within each cluster the most uncertain samples. Since the clustering is
+# performed on the whole unlabeled pool at each iteration, we use a
+# MiniBatchKMeans that is much faster on large pools.
 
 
 class KMeansClassSampler(BaseQuerySampler):
     def __init__(self, model, n_classes, batch_size):
-        self.clustering = KMeans(n_clusters=n_classes)
+        self.n_classes = n_classes
+        self.clustering = MiniBatchKMeans(n_clusters=n_classes,
+                                          batch_size=256, n_init=3)
         self.confidence_sampler = MarginSampler(model, batch_size // n_classes)
         super().__init__(batch_size)
     
@@ -76,15 +85,18 @@ class KMeansClassSampler(BaseQuerySampler):
         return self
     
     def select_samples(self, X):
-        self.clustering.fit(X)
-        all_samples = set()
-        for label in np.unique(self.clustering.labels_):
-            indices = np.arange(X.shape[0])
-            mask = np.zeros(X.shape[0], dtype=bool)
-            mask[self.clustering.labels_ == label] = True
-            selected = self.confidence_sampler.select_samples(X[mask])
-            all_samples.update(indices[mask][selected])
-        return pad_with_random(np.asarray(list(all_samples)), self.batch_size,
+        labels = self.clustering.fit(X).labels_
+        # Sorting samples by cluster makes each cluster a contiguous slice
+        order = np.argsort(labels, kind='stable')
+        bounds = np.cumsum(np.bincount(labels, minlength=self.n_classes))
+        all_samples = []
+        for cluster_indices in np.split(order, bounds[:-1]):
+            if cluster_indices.size == 0:
+                continue
+            selected = self.confidence_sampler.select_samples(
+                X[cluster_indices])
+            all_samples.append(cluster_indices[selected])
+        return pad_with_random(np.concatenate(all_samples), self.batch_size,
                                0, X.shape[0])
 
 
@@ -97,6 +109,10 @@ class_sampler = KMeansClassSampler(model, 15, 45)
 # We now compare our class sampler to Zhdanov, a simpler KMeans approach and, 
 # of course, random. For each method, we measure the time spent at each iteration 
 # and we plot the accuracy depending on the size of the labeled pool but also time spent.
+#
+# Trials are run one after the other so that the measured times are not
+# affected by other trials competing for the same cores. Each trial works on
+# its own copy of the model and of the sampler.
 
 samplers = [
     ('ClassSampler', class_sampler),
@@ -105,46 +121,55 @@ samplers = [
     ('Random', RandomSampler(batch_size)),
 ]
 
-figure_accuracies = plt.figure().number
-figure_execution_times = plt.figure().number
 
+def run_trial(k, model, sampler):
+    # The global random state that the model and the samplers rely on is
+    # seeded for each trial
+    np.random.seed(7 + k)
 
-for sampler_name, sampler in samplers:
-    
-    all_accuracies = []
-    all_execution_times = []
+    X_train, X_test, y_train, y_test = \
+        train_test_split(X, y, test_size=500, random_state=k)
 
-    for k in range(10):
-        X_train, X_test, y_train, y_test = \
-            train_test_split(X, y, test_size=500, random_state=k)
+    accuracies = []
+    execution_times = []
 
-        accuracies = []
-        execution_times = []
+    # For simplicity, we start with one sample of each class. Labels are
+    # integers so the first sample of each class is found in a single pass.
+    labeled_idx = np.full(n_classes, y_train.shape[0])
+    np.minimum.at(labeled_idx, y_train, np.arange(y_train.shape[0]))
 
-        # For simplicity, we start with one sample of each class
-        _, selected = np.unique(y_train, return_index=True)
+    # We keep track of the indices of labeled and unlabeled samples
+    unlabeled_idx = np.setdiff1d(np.arange(X_train.shape[0]), labeled_idx)
 
-        # We use binary masks to simplify some operations
-        mask = np.zeros(X_train.shape[0], dtype=bool)
-        indices = np.arange(X_train.shape[0])
-        mask[selected] = True
+    # The classic active learning loop
+    for j in range(n_iter):
+        X_labeled, y_labeled = X_train[labeled_idx], y_train[labeled_idx]
+        model.fit(X_labeled, y_labeled)
 
-        # The classic active learning loop
-        for j in range(n_iter):
-            model.fit(X_train[mask], y_train[mask])
+        # Record metrics
+        accuracies.append(model.score(X_test, y_test))
 
-            # Record metrics
-            accuracies.append(model.score(X_test, y_test))
+        t0 = time()
+        sampler.fit(X_labeled, y_labeled)
+        selected = sampler.select_samples(X_train[unlabeled_idx])
+        labeled_idx = np.concatenate([labeled_idx, unlabeled_idx[selected]])
+        unlabeled_idx = np.delete(unlabeled_idx, selected)
+        execution_times.append(time() - t0)
 
-            t0 = time()
-            sampler.fit(X_train[mask], y_train[mask])
-            selected = sampler.select_samples(X_train[~mask])
-            mask[indices[~mask][selected]] = True
-            execution_times.append(time() - t0)
+    return accuracies, execution_times
+
+
+figure_accuracies = plt.figure().number
+figure_execution_times = plt.figure().number
+
+
+for sampler_name, sampler in samplers:
+
+    # The model and the sampler are copied together so that samplers relying
+    # on the model keep sharing it within a trial
+    results = [run_trial(k, *deepcopy((model, sampler))) for k in range(10)]
+    all_accuracies, all_execution_times = zip(*results)
 
-        all_accuracies.append(accuracies)
-        all_execution_times.append(execution_times)
-    
     x_data = np.arange(10, batch_size * (n_iter - 1) + 11, batch_size)
     x_time = np.cumsum(np.mean(all_execution_times, axis=0))
 
@@ -177,10 +202,12 @@ plt.show()
 # ^^^^^^^^^^
 #
 # Let's start by focusing on the figure showing accuracy depending on the number
-# of labeled samples. We observe that regular KMeans is slightly better
-# at the beginning, probably because it is pure diversity and that exploration
-# is best at the beginning. After that, Zhdanov's method clearly takes over
-# the other methods.
+# of labeled samples. We observe that regular KMeans is better at the
+# beginning, probably because it is pure diversity and that exploration is
+# best at the beginning. After that, Zhdanov's method takes over the other
+# methods. Our class sampler, which clusters the pool with a MiniBatchKMeans
+# before looking at uncertainty, starts more slowly but catches up with
+# Zhdanov's method in the last iterations.
 #
 # Execution Times
 # ^^^^^^^^^^^^^^^
@@ -191,9 +218,13 @@ plt.show()
 # increase the accuracy of the model faster.
 #
 # In the plot showing accuracy depending on execution time, we first see a red
-# bar which is the random sampling. This method is almost instantaneous. We
-# also see that the domination of Zhdanov is even more clear. It is because
-# the two-step approach allows to greatly reduce the number of samples on which
-# the KMeans is performed. The difference is small here because we have a small
-# dataset but on a bigger one, the win can be significant. One can also
-# consider using mini-batch KMeans from scikit-learn that is faster.
+# bar which is the random sampling. This method is almost instantaneous. The
+# plain KMeans sampler comes next: on a dataset this small, clustering the
+# whole pool is cheap. Zhdanov's method and our class sampler are slower
+# because they refit the classifier to compute uncertainties, and this fit
+# dominates their execution time here. Our class sampler is the slowest since
+# it also clusters the whole pool before querying the classifier on each
+# cluster, whereas Zhdanov's two-step approach only clusters the preselected
+# samples. Using a MiniBatchKMeans keeps the clustering cost of the class
+# sampler low, and on a bigger dataset the gap between full and mini-batch
+# KMeans would be significant.
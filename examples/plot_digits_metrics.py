@@ -13,13 +13,16 @@ a custom query sampler that takes advantage of this.
 ##############################################################################
 # Those are the necessary imports and initializations
 
+from copy import deepcopy
+
 from matplotlib import pyplot as plt
 import numpy as np
+from joblib import Parallel, delayed
 
 from sklearn.datasets import load_digits
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import pairwise_distances
+from sklearn.metrics import pairwise_distances_chunked
 
 from cardinal.uncertainty import ConfidenceSampler
 from cardinal.clustering import KMeansSampler
@@ -44,6 +47,7 @@ n_iter = 20
 
 X, y = load_digits(return_X_y=True)
 X /= 255.
+X = X.astype(np.float32)
 n_classes = 10
 
 model = RandomForestClassifier()
@@ -69,9 +73,20 @@ def compute_contradiction(previous_proba, current_proba):
 # test set has been explored by our query sampling method so far. We expect
 # uncertainty sampling to explore the sample space located *nearby* the
 # decision boundary and show poor exploration property.
+#
+# Since the train and test sets do not change during an experiment, the sum of
+# the distances of each train sample to the test set is computed once. The
+# distances are computed by chunks and summed right away so that the full
+# distance matrix is never stored in memory. The metric then only picks the
+# sums of selected samples.
+
+def compute_distance_sums(X_train, X_test):
+    return np.concatenate(list(pairwise_distances_chunked(
+        X_train, X_test, reduce_func=lambda chunk, start: chunk.sum(axis=1))))
 
-def compute_exploration(X_selected, X_test):
-    return pairwise_distances(X_selected, X_test).mean()
+
+def compute_exploration(distance_sums, selected, n_test):
+    return distance_sums[selected].mean() / n_test
 
 ##############################################################################
 # A New Custom Sampler
@@ -114,7 +129,7 @@ class AdaptiveQuerySampler(BaseQuerySampler):
 
 adaptive_sampler = AdaptiveQuerySampler(
     KMeansSampler(batch_size),  # Exploration
-    ConfidenceSampler(model, batch_size),  # Exploitation
+    ConfidenceSampler(model, batch_size, assume_fitted=True),  # Exploitation
     n_classes * 5
 )
 
@@ -124,61 +139,82 @@ adaptive_sampler = AdaptiveQuerySampler(
 #
 # We now perform the experiment. We compare our adaptive model to random,
 # pure exploration, and pure exploitation. We also monitor the metrics
-# defined above.
+# defined above. The model is fitted on the labeled samples at the beginning
+# of each iteration, so the uncertainty samplers reuse it as is instead of
+# fitting it a second time.
+#
+# Each trial uses its own train/test split and is independent from the others
+# so we run them in parallel. Every trial works on its own copy of the model
+# and of the sampler.
 
 samplers = [
     ('Adaptive', adaptive_sampler),
-    ('Lowest confidence', ConfidenceSampler(model, batch_size)),
+    ('Lowest confidence', ConfidenceSampler(model, batch_size,
+                                            assume_fitted=True)),
     ('KMeans', KMeansSampler(batch_size)),
     ('Random', RandomSampler(batch_size)),
 ]
 
-figure_accuracies = plt.figure().number
-figure_contradictions = plt.figure().number
-figure_explorations = plt.figure().number
 
-for i, (sampler_name, sampler) in enumerate(samplers):
-    
-    all_accuracies = []
-    all_contradictions = []
-    all_explorations = []
+def run_trial(k, model, sampler):
+    # Trials may run in other processes, so the global random state that
+    # the model and the samplers rely on is seeded here for each trial
+    np.random.seed(7 + k)
 
-    for k in range(10):
-        X_train, X_test, y_train, y_test = \
-            train_test_split(X, y, test_size=500, random_state=k)
+    X_train, X_test, y_train, y_test = \
+        train_test_split(X, y, test_size=500, random_state=k)
+    distance_sums = compute_distance_sums(X_train, X_test)
 
-        accuracies = []
-        contradictions = ContradictionMonitor()
-        explorations = []
+    accuracies = []
+    contradictions = ContradictionMonitor()
+    explorations = []
 
-        previous_proba = None
+    previous_proba = None
 
-        # For simplicity, we start with one sample of each class
-        _, selected = np.unique(y_train, return_index=True)
+    # For simplicity, we start with one sample of each class. Labels are
+    # integers so the first sample of each class is found in a single pass.
+    selected = np.full(n_classes, y_train.shape[0])
+    np.minimum.at(selected, y_train, np.arange(y_train.shape[0]))
 
-        # We use binary masks to simplify some operations
-        mask = np.zeros(X_train.shape[0], dtype=bool)
-        indices = np.arange(X_train.shape[0])
-        mask[selected] = True
+    # We keep track of the indices of labeled and unlabeled samples
+    labeled_idx = selected
+    unlabeled_idx = np.setdiff1d(np.arange(X_train.shape[0]), labeled_idx)
 
-        # The classic active learning loop
-        for j in range(n_iter):
-            model.fit(X_train[mask], y_train[mask])
+    # The classic active learning loop
+    for j in range(n_iter):
+        X_labeled, y_labeled = X_train[labeled_idx], y_train[labeled_idx]
+        model.fit(X_labeled, y_labeled)
 
-            # Record metrics
-            accuracies.append(model.score(X_test, y_test))
-            explorations.append(compute_exploration(X_train[mask], X_test))
-            contradictions.accumulate(len(selected),
-                                      model.predict_proba(X_test))
+        # Record metrics. Predictions are derived from probabilities so
+        # that the forest is only evaluated once on the test set.
+        current_proba = model.predict_proba(X_test)
+        y_pred = model.classes_[current_proba.argmax(axis=1)]
+        accuracies.append((y_pred == y_test).mean())
+        explorations.append(compute_exploration(distance_sums, labeled_idx,
+                                                X_test.shape[0]))
+        contradictions.accumulate(len(selected), current_proba)
 
-            sampler.fit(X_train[mask], y_train[mask])
-            selected = sampler.select_samples(X_train[~mask])
-            mask[indices[~mask][selected]] = True
+        sampler.fit(X_labeled, y_labeled)
+        selected = sampler.select_samples(X_train[unlabeled_idx])
+        labeled_idx = np.concatenate([labeled_idx, unlabeled_idx[selected]])
+        unlabeled_idx = np.delete(unlabeled_idx, selected)
+
+    return accuracies, contradictions.get()['contradictions'], explorations
+
+
+figure_accuracies = plt.figure().number
+figure_contradictions = plt.figure().number
+figure_explorations = plt.figure().number
+
+for i, (sampler_name, sampler) in enumerate(samplers):
+
+    # The model and the sampler are copied together so that samplers relying
+    # on the model keep sharing it within a trial
+    results = Parallel(n_jobs=-1)(
+        delayed(run_trial)(k, *deepcopy((model, sampler)))
+        for k in range(10))
+    all_accuracies, all_contradictions, all_explorations = zip(*results)
 
-        all_accuracies.append(accuracies)
-        all_explorations.append(explorations)
-        all_contradictions.append(contradictions.get()['contradictions'])
-    
     x_data = np.arange(10, batch_size * (n_iter - 1) + 11, batch_size)
 
     plt.figure(figure_accuracies)